@@ -1,14 +1,32 @@
 import logging
 import json
 import sys
-from datetime import datetime
+import time
+
+try:
+    import orjson
+except ImportError:  # Fallback to stdlib json when orjson is unavailable
+    orjson = None
 
 class JSONFormatter(logging.Formatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (epoch second, formatted prefix) swapped as one tuple so threads never see a torn pair.
+        self._second_cache = (None, "")
+
+    def _format_timestamp(self, record: logging.LogRecord) -> str:
+        second = int(record.created)
+        cached_second, prefix = self._second_cache
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second_cache = (second, prefix)
+        return f"{prefix}.{int(record.msecs):03d}Z"
+
     def format(self, record):
         log_obj = {
             "severity": record.levelname,
             "message": record.getMessage(),
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": self._format_timestamp(record),
             "logger": record.name,
             "module": record.module,
             "funcName": record.funcName,
@@ -16,6 +34,12 @@ class JSONFormatter(logging.Formatter):
         }
         if record.exc_info:
             log_obj["exc_info"] = self.formatException(record.exc_info)
+        if orjson is not None:
+            try:
+                return orjson.dumps(log_obj).decode()
+            except TypeError:  # orjson.JSONEncodeError subclasses this; e.g. lone surrogates
+                pass
+        # ensure_ascii escapes surrogates (surrogateescape filenames) so the line stays writable as UTF-8.
         return json.dumps(log_obj)
 
 def setup_logging(level="INFO"):
@@ -1,15 +1,67 @@
 import os
 import json
-import glob
 import random
-from typing import List, Dict, Optional
+import functools
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2 import service_account
-from google.cloud import storage
 from config.settings import settings
 import logging
 
+if TYPE_CHECKING:
+    from google.cloud import storage
+
+try:
+    import orjson
+except ImportError:  # Fallback to stdlib json when orjson is unavailable
+    orjson = None
+
 logger = logging.getLogger("config.manager")
 
+PROXY_ENV_KEYS = ("https_proxy", "http_proxy", "HTTPS_PROXY", "HTTP_PROXY")
+HTTP_POOL_CONNECTIONS = 32
+HTTP_POOL_MAXSIZE = 64
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets enable TCP keepalive so idle connections survive NAT/proxy timeouts."""
+
+    _socket_options = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        # Traffic normally goes through HTTPS_PROXY, which uses these managers, not the pool manager.
+        proxy_kwargs.setdefault("socket_options", self._socket_options)
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+def _pooled_adapter() -> HTTPAdapter:
+    return _KeepAliveAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+
+
+# One process-wide keep-alive pool for token refreshes (startup warmup and on-demand) and the
+# Vertex REST chat calls. Retries stay in Dispatcher, which already backs off and rotates projects.
+http_session = requests.Session()
+http_session.mount("https://", _pooled_adapter())
+auth_request = Request(session=http_session)
+
+
+def _build_authorized_session(credentials) -> AuthorizedSession:
+    session = AuthorizedSession(credentials, auth_request=auth_request)
+    session.mount("https://", _pooled_adapter())
+    return session
+
 class ConfigManager:
     """
     Headless Config Manager.
@@ -17,32 +69,46 @@ class ConfigManager:
     Manages Global Proxy.
     """
     _instance = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(ConfigManager, cls).__new__(cls)
-            cls._instance.initialized = False
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super(ConfigManager, cls).__new__(cls)
+                    instance.initialized = False
+                    cls._instance = instance
         return cls._instance
 
     def __init__(self):
         if self.initialized:
             return
-            
-        self.project_pool: List[Dict] = []
-        self.project_map: Dict[str, Dict] = {}
-        self._storage_clients: Dict[str, storage.Client] = {}
-        self.apply_proxy()
-        self.load_projects()
-        self.initialized = True
+
+        with self._lock:
+            # Another thread may have finished initialization while we waited.
+            if self.initialized:
+                return
+
+            self.project_pool: List[Dict] = []
+            self.project_map: Dict[str, Dict] = {}
+            self.project_ids: Tuple[str, ...] = ()
+            self._storage_clients: Dict[str, "storage.Client"] = {}
+            self.apply_proxy()
+            self.load_projects()
+            self.initialized = True
 
     def apply_proxy(self):
         """Apply HTTPS_PROXY from settings to environment variables."""
         if settings.HTTPS_PROXY:
+            changed = {
+                key: settings.HTTPS_PROXY
+                for key in PROXY_ENV_KEYS
+                if os.environ.get(key) != settings.HTTPS_PROXY
+            }
+            if not changed:
+                return
             logger.info(f"Applying Global Proxy: {settings.HTTPS_PROXY}")
-            os.environ["https_proxy"] = settings.HTTPS_PROXY
-            os.environ["http_proxy"] = settings.HTTPS_PROXY
-            os.environ["HTTPS_PROXY"] = settings.HTTPS_PROXY
-            os.environ["HTTP_PROXY"] = settings.HTTPS_PROXY
+            os.environ.update(changed)
         else:
             logger.info("No Proxy Configured (Direct Connect).")
 
@@ -50,6 +116,7 @@ class ConfigManager:
         """Load project keys from grouped or flat json directories."""
         self.project_pool = []
         self.project_map = {}
+        self.project_ids = ()
         self._storage_clients = {}
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         json_root_dir = os.path.join(base_dir, "json")
@@ -57,49 +124,86 @@ class ConfigManager:
         if not key_files:
             return
 
-        for key_path in key_files:
-            try:
-                with open(key_path, 'r') as f:
-                    key_data = json.load(f)
-                
-                project_id = str(key_data.get("project_id", "")).strip()
-                if not project_id:
-                    logger.warning(f"File {key_path} is missing 'project_id', skipping.")
-                    continue
-
-                if project_id in self.project_map:
-                    logger.warning(f"Duplicate project_id {project_id} in {key_path}, skipping duplicate key.")
-                    continue
-
-                # Filter AI Studio Keys (gen-lang-client) as per user request
-                if "gen-lang-client" in project_id:
-                    logger.info(f"Skipping AI Studio Key: {project_id}")
-                    continue
-                
-                credentials = service_account.Credentials.from_service_account_info(
-                    key_data,
-                    scopes=["https://www.googleapis.com/auth/cloud-platform"]
+        # Key parsing and RSA import dominate startup; the crypto backend releases the GIL.
+        with ThreadPoolExecutor(max_workers=min(32, len(key_files))) as executor:
+            loaded_contexts = list(executor.map(self._load_key_file, key_files))
+
+        # Merge serially to keep pool order deterministic and duplicates resolved by path order.
+        for project_context in loaded_contexts:
+            if project_context is None:
+                continue
+
+            project_id = project_context["project_id"]
+            if project_id in self.project_map:
+                logger.warning(
+                    f"Duplicate project_id {project_id} in {project_context['key_path']}, skipping duplicate key."
                 )
-                
-                project_context = {
-                    "project_id": project_id,
-                    "credentials": credentials,
-                    "key_path": key_path,
-                    "region": settings.REGION
-                }
-                self.project_pool.append(project_context)
-                self.project_map[project_id] = project_context
-                logger.info(f"Loaded Project: {project_id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to load key {key_path}: {e}")
+                continue
 
+            self.project_pool.append(project_context)
+            self.project_map[project_id] = project_context
+            logger.info(f"Loaded Project: {project_id}")
+
+        self.project_ids = tuple(self.project_map)
         logger.info(f"Successfully loaded {len(self.project_pool)} projects into pool.")
         
         # Ensure Bucket Exists only when batch mode is enabled
         if settings.BATCH_ENABLED and self.project_pool and settings.BUCKET_NAME:
             p = self.project_pool[0]
-            self._ensure_bucket_exists(settings.BUCKET_NAME, p["project_id"], p["credentials"], settings.REGION)
+            self._ensure_bucket_exists(settings.BUCKET_NAME, p["project_id"], settings.REGION)
+
+    def _load_key_file(self, key_path: str) -> Optional[Dict]:
+        try:
+            if orjson is not None:
+                with open(key_path, 'rb') as f:
+                    key_data = orjson.loads(f.read())
+            else:
+                with open(key_path, 'r') as f:
+                    key_data = json.load(f)
+
+            project_id = str(key_data.get("project_id", "")).strip()
+            if not project_id:
+                logger.warning(f"File {key_path} is missing 'project_id', skipping.")
+                return None
+
+            # Filter AI Studio Keys (gen-lang-client) as per user request
+            if "gen-lang-client" in project_id:
+                logger.info(f"Skipping AI Studio Key: {project_id}")
+                return None
+
+            credentials = service_account.Credentials.from_service_account_info(
+                key_data,
+                scopes=["https://www.googleapis.com/auth/cloud-platform"]
+            )
+
+            return {
+                "project_id": project_id,
+                "credentials": credentials,
+                "key_path": key_path,
+                "region": settings.REGION
+            }
+        except Exception as e:
+            logger.error(f"Failed to load key {key_path}: {e}")
+            return None
+
+    @staticmethod
+    def _scan_json_files(directory: str, include_dirs: bool = False) -> tuple[List[str], List[str]]:
+        """Return (json files, subdirectories) of `directory` from a single scandir pass."""
+        json_files: List[str] = []
+        sub_dirs: List[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # glob("*.json") never matched dotfiles (e.g. macOS ._k0.json); keep skipping them.
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.name.endswith(".json") and entry.is_file():
+                        json_files.append(entry.path)
+                    elif include_dirs and entry.is_dir():
+                        sub_dirs.append(entry.path)
+        except OSError:
+            pass
+        return json_files, sub_dirs
 
     def _discover_key_files(self, json_root_dir: str) -> List[str]:
         active_group = (settings.ACTIVE_KEY_GROUP or "").strip()
@@ -113,20 +217,27 @@ class ConfigManager:
             return []
 
         if active_group.lower() in {"all", "*"}:
-            key_files.extend(glob.glob(os.path.join(json_root_dir, "*.json")))
-            key_files.extend(glob.glob(os.path.join(json_root_dir, "*", "*.json")))
+            root_files, group_dirs = self._scan_json_files(json_root_dir, include_dirs=True)
+            # Only this layout can reach one file twice (symlinked groups), so dedupe by realpath here.
+            by_realpath: Dict[str, str] = {}
+            for path in root_files:
+                by_realpath.setdefault(os.path.realpath(path), path)
+            for group_dir in group_dirs:
+                for path in self._scan_json_files(group_dir)[0]:
+                    by_realpath.setdefault(os.path.realpath(path), path)
+            key_files.extend(by_realpath.values())
             logger.info("ACTIVE_KEY_GROUP=all, scanning both flat and grouped key layouts.")
         else:
-            groups = [group.strip() for group in active_group.split(",") if group.strip()]
+            groups = dict.fromkeys(group.strip() for group in active_group.split(",") if group.strip())
             for group in groups:
                 grouped_dir = os.path.join(json_root_dir, group)
-                matches = glob.glob(os.path.join(grouped_dir, "*.json"))
+                matches = self._scan_json_files(grouped_dir)[0]
                 if matches:
                     logger.info(f"Found {len(matches)} key files in group {group}.")
                 key_files.extend(matches)
 
             if not key_files:
-                fallback_files = glob.glob(os.path.join(json_root_dir, "*.json"))
+                fallback_files = self._scan_json_files(json_root_dir)[0]
                 if fallback_files:
                     logger.warning(
                         f"No grouped keys found for ACTIVE_KEY_GROUP={active_group}. "
@@ -134,17 +245,18 @@ class ConfigManager:
                     )
                 key_files.extend(fallback_files)
 
-        unique_files = sorted({os.path.abspath(path) for path in key_files if os.path.isfile(path)})
+        # scandir already yielded absolute, regular-file paths with no duplicates.
+        unique_files = sorted(key_files)
         if not unique_files:
             logger.warning(
                 f"No key files found for ACTIVE_KEY_GROUP={active_group or '<empty>'} under {json_root_dir}."
             )
         return unique_files
 
-    def _ensure_bucket_exists(self, bucket_name, project_id, credentials, location):
+    def _ensure_bucket_exists(self, bucket_name, project_id, location):
         """Ensure GCS Bucket exists."""
         try:
-            storage_client = storage.Client(credentials=credentials, project=project_id)
+            storage_client = self.get_storage_client(project_id)
             bucket = storage_client.bucket(bucket_name)
             if not bucket.exists():
                 logger.info(f"Bucket {bucket_name} not found. Creating in {location}...")
@@ -155,12 +267,35 @@ class ConfigManager:
         except Exception as e:
             logger.warning(f"Failed to ensure bucket {bucket_name} exists: {e}")
 
+    def warmup_credentials(self) -> None:
+        """Fetch an access token for every loaded project so first requests skip the token exchange."""
+        if not self.project_pool:
+            return
+
+        def _refresh(project_context: Dict) -> bool:
+            try:
+                project_context["credentials"].refresh(auth_request)
+                return True
+            except Exception as e:
+                logger.warning(f"Credential warmup failed for {project_context['project_id']}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=min(32, len(self.project_pool))) as executor:
+            warmed = sum(executor.map(_refresh, self.project_pool))
+        logger.info(f"Warmed credentials for {warmed}/{len(self.project_pool)} projects.")
+
     def get_random_project(self) -> Optional[Dict]:
         if not self.project_pool:
             return None
         return random.choice(self.project_pool)
 
-    def get_storage_client(self, project_id: Optional[str] = None) -> storage.Client:
+    def get_random_projects(self, k: int) -> List[Dict]:
+        """Sample k projects with replacement in one call."""
+        if not self.project_pool:
+            return []
+        return random.choices(self.project_pool, k=k)
+
+    def get_storage_client(self, project_id: Optional[str] = None) -> "storage.Client":
         if not self.project_pool:
             raise RuntimeError("No active projects loaded, cannot create storage client.")
 
@@ -173,9 +308,13 @@ class ConfigManager:
         if cached_client:
             return cached_client
 
+        # Deferred: chat-only deployments never need the storage library.
+        from google.cloud import storage
+
         client = storage.Client(
             credentials=target_project["credentials"],
             project=target_project_id,
+            _http=_build_authorized_session(target_project["credentials"]),
         )
         self._storage_clients[target_project_id] = client
         return client
@@ -185,4 +324,13 @@ class ConfigManager:
             return None
         return self.project_map.get(str(project_id))
 
-config_manager = ConfigManager()
+@functools.lru_cache(maxsize=None)
+def get_config_manager() -> ConfigManager:
+    return ConfigManager()
+
+
+def __getattr__(name: str):
+    # Build the singleton on first access so importing this module has no side effects.
+    if name == "config_manager":
+        return get_config_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,6 @@
 import os
 from typing import Optional
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
 # 强制加载 .env，覆盖系统变量
@@ -32,6 +32,9 @@ class Settings(BaseSettings):
     BATCH_ENABLED: bool = False
     MAX_CONCURRENT_JOBS: int = 5
     JOB_TIMEOUT_SECONDS: int = 7200  # 2小时超时熔断
+    GCS_READ_PARALLELISM: int = 8  # Concurrent prediction shard downloads per job
+    SCHEDULER_ACTIVE_INTERVAL_SECONDS: int = 10  # Poll interval while RUNNING jobs exist
+    SCHEDULER_IDLE_INTERVAL_SECONDS: int = 300  # Poll interval when no jobs are in flight
 
     # Chat Routing / Retry
     CHAT_RETRY_PER_PROJECT: int = 3
@@ -39,15 +42,27 @@ class Settings(BaseSettings):
     CHAT_BACKOFF_MAX_SECONDS: float = 8.0
     CHAT_BACKOFF_JITTER_SECONDS: float = 0.4
     CHAT_MIN_INTERVAL_SECONDS: float = 0.2
+    COOLDOWN_WINDOW_SIZE: int = 64  # Recent dispatch outcomes used to size the cooldown
+    COOLDOWN_WINDOW_SECONDS: float = 600.0  # Outcomes older than this no longer count toward the cooldown
+    COOLDOWN_MIN_SAMPLES: int = 10  # Failures (in the window or back-to-back) needed to reach the max cooldown
+    COOLDOWN_MIN_SECONDS: float = 5.0
+    COOLDOWN_MAX_SECONDS: float = 300.0
+    CHAT_HEDGE_FANOUT: int = 1  # Projects tried concurrently per chat; >1 trades token spend for tail latency
+    WARMUP_ON_STARTUP: bool = True  # Pre-fetch OAuth tokens so the first chat skips the token exchange
     
     # 数据库
     DATABASE_URL: str = _default_database_url()
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 3600
     
     # 日志
     LOG_LEVEL: str = "INFO"
 
-    class Config:
-        env_file = ".env"
-        extra = "ignore"  # 忽略多余的环境变量
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        extra="ignore",  # 忽略多余的环境变量
+    )
 
 settings = Settings()
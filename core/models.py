@@ -1,6 +1,7 @@
 import os
 import logging
-from sqlalchemy import Column, String, Integer, DateTime, Text, create_engine
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index, create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from datetime import datetime
 from config.settings import settings
@@ -28,9 +29,15 @@ def _prepare_sqlite_directory(database_url: str) -> None:
 
 class BatchJob(Base):
     __tablename__ = "batch_jobs"
+    __table_args__ = (
+        # Scheduler polls RUNNING jobs and checks updated_at for timeouts.
+        Index("ix_batch_jobs_status_updated", "status", "updated_at"),
+        # String UUID key: store rows in the PK b-tree instead of a rowid table plus autoindex.
+        {"sqlite_with_rowid": False},
+    )
 
-    id = Column(String, primary_key=True, index=True)
-    status = Column(String, default="PENDING", index=True)  # PENDING, SUBMITTED, RUNNING, SUCCEEDED, FAILED
+    id = Column(String, primary_key=True)
+    status = Column(String, default="PENDING")  # PENDING, SUBMITTED, RUNNING, SUCCEEDED, FAILED
     
     # Job Details
     input_gcs_uri = Column(String)
@@ -52,12 +59,41 @@ class BatchJob(Base):
     def __repr__(self):
         return f"<BatchJob(id={self.id}, status={self.status}, project={self.used_project_id})>"
 
+def _create_engine(database_url: str):
+    if database_url.startswith("sqlite"):
+        # SQLite connections are local file handles; pre-ping/recycle is wasted work.
+        return create_engine(database_url, connect_args={"check_same_thread": False})
+
+    return create_engine(
+        database_url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=True,
+    )
+
 # DB Init
 _prepare_sqlite_directory(settings.DATABASE_URL)
-engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = _create_engine(settings.DATABASE_URL)
+
+
+@event.listens_for(engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+
+    # WAL lets API reads proceed while the scheduler writes; NORMAL sync drops the per-commit fsync.
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA busy_timeout=5000")
+    finally:
+        cursor.close()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def init_db():
@@ -65,8 +101,29 @@ def init_db():
     if engine.dialect.name == "sqlite":
         with engine.begin() as conn:
             conn.exec_driver_sql(
-                "CREATE INDEX IF NOT EXISTS ix_batch_jobs_status ON batch_jobs (status)"
+                "CREATE INDEX IF NOT EXISTS ix_batch_jobs_status_updated ON batch_jobs (status, updated_at)"
             )
+            # Superseded by the composite index's leading column.
+            conn.exec_driver_sql("DROP INDEX IF EXISTS ix_batch_jobs_status")
             conn.exec_driver_sql(
                 "CREATE INDEX IF NOT EXISTS ix_batch_jobs_updated_at ON batch_jobs (updated_at)"
             )
+
+
+def _ping_connection() -> None:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+def warm_pool(n: int) -> None:
+    """Open up to `n` pooled connections concurrently so the first requests skip the handshake."""
+    if n <= 0:
+        return
+
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        futures = [executor.submit(_ping_connection) for _ in range(n)]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as exc:
+                logger.warning(f"DB pool warmup connection failed: {exc}")
@@ -74,22 +74,25 @@ def print_runtime_config() -> None:
     print(json.dumps(config, ensure_ascii=False, indent=2))
 
 
+def count_json_entries(directory: str) -> int:
+    with os.scandir(directory) as entries:
+        return sum(1 for entry in entries if entry.name.endswith(".json"))
+
+
 def check_key_layout() -> None:
     json_root = os.path.join(os.getcwd(), "json")
     group_dir = os.path.join(json_root, settings.ACTIVE_KEY_GROUP)
 
-    root_files = []
-    grouped_files = []
-    if os.path.isdir(json_root):
-        root_files = [f for f in os.listdir(json_root) if f.endswith(".json")]
-    if os.path.isdir(group_dir):
-        grouped_files = [f for f in os.listdir(group_dir) if f.endswith(".json")]
+    root_exists = os.path.isdir(json_root)
+    group_exists = os.path.isdir(group_dir)
+    root_count = count_json_entries(json_root) if root_exists else 0
+    group_count = count_json_entries(group_dir) if group_exists else 0
 
     print("\n[CHECK] Key layout")
-    print(f"json root exists: {os.path.isdir(json_root)}")
-    print(f"group dir exists: {os.path.isdir(group_dir)}")
-    print(f"root json count: {len(root_files)}")
-    print(f"group json count: {len(grouped_files)}")
+    print(f"json root exists: {root_exists}")
+    print(f"group dir exists: {group_exists}")
+    print(f"root json count: {root_count}")
+    print(f"group json count: {group_count}")
 
 
 def smoke_api() -> None:
@@ -122,8 +125,9 @@ def smoke_api() -> None:
 
     try:
         health_ok = False
-        for _ in range(40):
-            time.sleep(1)
+        deadline = time.time() + 40
+        delay = 0.05
+        while time.time() < deadline:
             if proc.poll() is not None:
                 break
             try:
@@ -133,7 +137,9 @@ def smoke_api() -> None:
                     health_ok = True
                     break
             except requests.RequestException:
-                continue
+                pass
+            time.sleep(delay)
+            delay = min(delay * 1.5, 2.0)
 
         if not health_ok:
             print("health: failed to reach endpoint")
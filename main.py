@@ -4,6 +4,7 @@ from services.dispatcher import dispatcher
 from config.logging_config import setup_logging
 from config.manager import config_manager
 from config.settings import settings
+import asyncio
 import logging
 import time
 
@@ -19,15 +20,20 @@ def startup_event():
 
     logger.info(f"Active Project Pool Size: {len(config_manager.project_pool)}")
 
+    if settings.WARMUP_ON_STARTUP:
+        config_manager.warmup_credentials()
+
     if settings.BATCH_ENABLED:
+        from core.models import warm_pool
         from scheduler import start_scheduler
 
+        warm_pool(settings.DB_POOL_SIZE)
         start_scheduler()
     else:
         logger.info("Batch mode disabled. Scheduler not started.")
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {
         "status": "ok", 
         "pool_size": len(config_manager.project_pool),
@@ -50,17 +56,19 @@ class ChatRequest(BaseModel):
     thinking_level: Optional[str] = None
 
 @app.post("/chat")
-def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest):
     if not config_manager.initialized:
         # Should be initialized by startup_event, but just in case
-        config_manager.load_projects()
+        await asyncio.to_thread(config_manager.load_projects)
 
     if not config_manager.project_pool:
         logger.error("No projects available for chat.")
         raise HTTPException(status_code=503, detail="No active projects available.")
     
     try:
-        response_text = dispatcher.dispatch_chat(
+        # dispatch_chat blocks on HTTP calls, retries and back-off sleeps; keep it off the event loop.
+        response_text = await asyncio.to_thread(
+            dispatcher.dispatch_chat,
             prompt=request.query,
             model_id=request.model,
             sys_prompt=request.sys_prompt,
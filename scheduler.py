@@ -1,93 +1,170 @@
-from apscheduler.schedulers.background import BackgroundScheduler
 from core.models import SessionLocal, BatchJob
-from services.gcs_handler import GCSHandler
 from services.vertex_handler import VertexHandler
 from config.manager import config_manager
 from config.settings import settings
-from datetime import datetime
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from typing import Any, Dict, List, Tuple
 import logging
 
 logger = logging.getLogger("scheduler")
 
-def process_pipelines():
-    """Main Scheduler Loop"""
-    db = SessionLocal()
+JOB_FETCH_BATCH_SIZE = 50
+STATUS_POLL_WORKERS = 32
+PIPELINE_JOB_ID = "process_pipelines"
+
+# Reused across ticks; only the scheduler thread touches this (APScheduler max_instances=1).
+_vertex_handlers: Dict[str, VertexHandler] = {}
+
+def _get_vertex_handler(project_context: Dict[str, Any]) -> VertexHandler:
+    project_id = project_context["project_id"]
+    handler = _vertex_handlers.get(project_id)
+    # A reload of the key pool produces new context dicts; rebuild rather than keep stale credentials.
+    if handler is None or handler.context is not project_context:
+        handler = VertexHandler(project_context)
+        _vertex_handlers[project_id] = handler
+    return handler
+
+def _poll_job_state(vertex: VertexHandler, vertex_job_id: str) -> str:
     try:
-        jobs = db.query(BatchJob).filter(BatchJob.status == "RUNNING").all()
-        if not jobs:
-            return
-
-        if len(jobs) > settings.MAX_CONCURRENT_JOBS:
-            logger.warning(
-                f"RUNNING jobs exceed limit: {len(jobs)}/{settings.MAX_CONCURRENT_JOBS}"
-            )
-
-        gcs = GCSHandler()
-        has_updates = False
-        now = datetime.utcnow()
-
-        for raw_job in jobs:
-            job: Any = raw_job
-            try:
-                reference_time = job.updated_at or job.created_at or now
-                if (now - reference_time).total_seconds() > settings.JOB_TIMEOUT_SECONDS:
-                    logger.error(f"Job {job.id} TIMED OUT.")
-                    job.status = "FAILED"
-                    job.result_summary = "Timeout: Job stuck in RUNNING"
-                    has_updates = True
-                    continue
-
-                project_context = config_manager.get_project_by_id(job.used_project_id)
-                if not project_context:
-                    logger.error(
-                        f"Project {job.used_project_id} not found for Job {job.id}. Cannot check status."
+        return vertex.get_job_status(vertex_job_id)
+    except Exception as e:
+        logger.error(f"Status poll failed for {vertex_job_id}: {e}")
+        return "UNKNOWN"
+
+def process_pipelines() -> bool:
+    """Main Scheduler Loop. Returns True when RUNNING jobs were seen this tick."""
+    from services.gcs_handler import GCSHandler
+
+    job_count = 0
+    with SessionLocal() as db:
+        try:
+            now = datetime.utcnow()
+            cutoff = now - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS)
+
+            # Sweep timeouts in one statement; the RUNNING scan below then only sees live jobs.
+            timed_out = db.execute(
+                update(BatchJob)
+                .where(
+                    BatchJob.status == "RUNNING",
+                    func.coalesce(BatchJob.updated_at, BatchJob.created_at) < cutoff,
+                )
+                .values(status="FAILED", result_summary="Timeout: Job stuck in RUNNING")
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if timed_out:
+                logger.error(f"{timed_out} job(s) TIMED OUT.")
+
+            jobs = db.execute(
+                select(BatchJob)
+                .where(BatchJob.status == "RUNNING")
+                .execution_options(yield_per=JOB_FETCH_BATCH_SIZE)
+            ).scalars()
+
+            gcs = GCSHandler()
+            has_updates = timed_out > 0
+            pending_polls: List[Tuple[Any, VertexHandler, str]] = []
+            # One reference for the whole tick; load_projects swaps in a fresh dict on reload.
+            project_index = config_manager.project_map
+
+            # Pass 1: resolve remaining local transitions and collect jobs that need a Vertex status call.
+            for raw_job in jobs:
+                job: Any = raw_job
+                job_count += 1
+                try:
+                    project_context = (
+                        project_index.get(str(job.used_project_id)) if job.used_project_id else None
                     )
-                    continue
+                    if not project_context:
+                        logger.error(
+                            f"Project {job.used_project_id} not found for Job {job.id}. Cannot check status."
+                        )
+                        continue
 
-                if not job.vertex_job_id:
-                    logger.error(f"Job {job.id} missing vertex_job_id. Marking as FAILED.")
-                    job.status = "FAILED"
-                    job.result_summary = "Missing Vertex job resource name"
-                    has_updates = True
-                    continue
+                    if not job.vertex_job_id:
+                        logger.error(f"Job {job.id} missing vertex_job_id. Marking as FAILED.")
+                        job.status = "FAILED"
+                        job.result_summary = "Missing Vertex job resource name"
+                        has_updates = True
+                        continue
 
-                vertex = VertexHandler(project_context)
-                state = vertex.get_job_status(job.vertex_job_id)
+                    vertex = _get_vertex_handler(project_context)
+                    pending_polls.append((job, vertex, job.vertex_job_id))
+                except Exception as job_error:
+                    logger.error(f"Failed to process job {job.id}: {job_error}")
 
-                if state == "JOB_STATE_SUCCEEDED":
-                    logger.info(f"Job {job.id} SUCCEEDED")
-                    job.status = "SUCCEEDED"
+            if job_count > settings.MAX_CONCURRENT_JOBS:
+                logger.warning(
+                    f"RUNNING jobs exceed limit: {job_count}/{settings.MAX_CONCURRENT_JOBS}"
+                )
 
-                    if job.output_gcs_uri:
-                        prefix = job.output_gcs_uri.replace(
-                            f"gs://{settings.BUCKET_NAME}/", "", 1
+            # Pass 2: status calls are pure network round trips, so overlap them.
+            states: List[str] = []
+            if pending_polls:
+                with ThreadPoolExecutor(max_workers=min(STATUS_POLL_WORKERS, len(pending_polls))) as executor:
+                    states = list(
+                        executor.map(
+                            lambda item: _poll_job_state(item[1], item[2]),
+                            pending_polls,
                         )
-                        results = gcs.read_batch_output(prefix)
-                        job.result_summary = f"Processed {len(results)} items."
-                    else:
-                        job.result_summary = "Completed, but output path is missing"
+                    )
 
-                    has_updates = True
+            # Pass 3: apply transitions on this thread so the session is never shared.
+            for (job, _, _), state in zip(pending_polls, states):
+                try:
+                    if state == "JOB_STATE_SUCCEEDED":
+                        logger.info(f"Job {job.id} SUCCEEDED")
+                        job.status = "SUCCEEDED"
 
-                elif state in ["JOB_STATE_FAILED", "JOB_STATE_CANCELLED"]:
-                    logger.warning(f"Job {job.id} matches Vertex State: {state}")
-                    job.status = "FAILED"
-                    job.result_summary = f"Vertex Job Failed: {state}"
-                    has_updates = True
-            except Exception as job_error:
-                logger.error(f"Failed to process job {job.id}: {job_error}")
+                        if job.output_gcs_uri:
+                            prefix = job.output_gcs_uri.replace(
+                                f"gs://{settings.BUCKET_NAME}/", "", 1
+                            )
+                            results = gcs.read_batch_output(prefix)
+                            job.result_summary = f"Processed {len(results)} items."
+                        else:
+                            job.result_summary = "Completed, but output path is missing"
 
-        if has_updates:
-            db.commit()
+                        has_updates = True
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Scheduler Loop Error: {e}")
-    finally:
-        db.close()
+                    elif state in ["JOB_STATE_FAILED", "JOB_STATE_CANCELLED"]:
+                        logger.warning(f"Job {job.id} matches Vertex State: {state}")
+                        job.status = "FAILED"
+                        job.result_summary = f"Vertex Job Failed: {state}"
+                        has_updates = True
+                except Exception as job_error:
+                    logger.error(f"Failed to process job {job.id}: {job_error}")
+
+            if has_updates:
+                db.commit()
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Scheduler Loop Error: {e}")
+
+    return job_count > 0
 
 def start_scheduler():
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+
     scheduler = BackgroundScheduler()
-    scheduler.add_job(process_pipelines, 'interval', minutes=1)
+    current_interval = settings.SCHEDULER_ACTIVE_INTERVAL_SECONDS
+
+    def _adaptive_tick() -> None:
+        nonlocal current_interval
+        had_jobs = process_pipelines()
+        # Poll tightly while jobs are in flight, back off when the queue is idle.
+        interval = (
+            settings.SCHEDULER_ACTIVE_INTERVAL_SECONDS
+            if had_jobs
+            else settings.SCHEDULER_IDLE_INTERVAL_SECONDS
+        )
+        if interval != current_interval:
+            current_interval = interval
+            scheduler.reschedule_job(PIPELINE_JOB_ID, trigger=IntervalTrigger(seconds=interval))
+            logger.info(f"Scheduler interval set to {interval}s")
+
+    scheduler.add_job(_adaptive_tick, 'interval', seconds=current_interval, id=PIPELINE_JOB_ID)
     scheduler.start()
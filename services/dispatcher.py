@@ -1,8 +1,11 @@
 import time
 import random
 import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections import deque
+from itertools import chain, islice
 from threading import Lock
-from typing import Dict, Any, Optional, List
+from typing import Deque, Dict, Any, Optional, List, Tuple
 from services.vertex_handler import VertexHandler
 from config.manager import config_manager
 from config.settings import settings
@@ -15,6 +18,12 @@ class Dispatcher:
         self._chat_cursor = 0
         self._next_allowed_ts: Dict[str, float] = {}
         self._lock = Lock()
+        # Recent (timestamp, success) dispatch outcomes that size the next cooldown.
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=max(1, settings.COOLDOWN_WINDOW_SIZE))
+        # Consecutive full failures; a sustained outage spaces failures by the cooldown itself,
+        # so few of them fit in the time window and the streak is what escalates to the cap.
+        self._failure_streak = 0
+        self._last_failure_ts = 0.0
 
     def _ordered_projects(self, pool: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], int]:
         if not pool:
@@ -37,6 +46,42 @@ class Dispatcher:
         if wait_seconds > 0:
             time.sleep(wait_seconds)
 
+    def _record_outcome(self, success: bool, now: float) -> None:
+        """Append an outcome and age out entries past the window horizon. Caller holds self._lock."""
+        self._outcomes.append((now, success))
+        horizon = now - max(0.0, settings.COOLDOWN_WINDOW_SECONDS)
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self._record_outcome(True, time.time())
+            self._failure_streak = 0
+
+    def _trigger_cooldown(self) -> float:
+        """Record a fully failed dispatch and start a cooldown scaled by the recent failure ratio."""
+        min_seconds = max(0.0, settings.COOLDOWN_MIN_SECONDS)
+        max_seconds = max(min_seconds, settings.COOLDOWN_MAX_SECONDS)
+        with self._lock:
+            now = time.time()
+            self._record_outcome(False, now)
+            if now - self._last_failure_ts > settings.COOLDOWN_WINDOW_SECONDS:
+                self._failure_streak = 0
+            self._failure_streak += 1
+            self._last_failure_ts = now
+
+            min_samples = max(1, settings.COOLDOWN_MIN_SAMPLES)
+            # Ratio over what is actually in the window; below min_samples the missing samples
+            # count as healthy, so a lone transient stays near the floor.
+            failures = sum(1 for _, success in self._outcomes if not success)
+            window_ratio = failures / max(len(self._outcomes), min_samples)
+            # min_samples back-to-back failures mean an outage: escalate to the cap.
+            streak_ratio = min(1.0, self._failure_streak / min_samples)
+            failure_ratio = max(window_ratio, streak_ratio)
+            cooldown = min_seconds + (max_seconds - min_seconds) * failure_ratio
+            self.cooldown_until = now + cooldown
+        return cooldown
+
     def _backoff_delay(self, attempt_index: int) -> float:
         base = max(0.0, settings.CHAT_BACKOFF_BASE_SECONDS)
         cap = max(base, settings.CHAT_BACKOFF_MAX_SECONDS)
@@ -65,7 +110,7 @@ class Dispatcher:
         # 1. Global Cooldown Check
         if time.time() < self.cooldown_until:
             remaining = int(self.cooldown_until - time.time())
-            message = f"System in cooldown (60s). Retry in {remaining}s"
+            message = f"System in cooldown. Retry in {remaining}s"
             job.status = "FAILED"
             job.result_summary = message
             db.commit()
@@ -87,8 +132,8 @@ class Dispatcher:
             input_items = [PipelineLogic.build_input_for_stage(1, original_request={**request_data, "id": job_uuid})]
             
             input_uri = gcs.upload_jsonl(input_items, f"{job_uuid}/stage_1/input.jsonl")
+            # Persisted with the final status below; nothing is flushed until then.
             job.input_gcs_uri = input_uri
-            db.commit()
         except Exception as e:
             logger.error(f"GCS Upload Failed: {e}")
             job.status = "FAILED"
@@ -97,7 +142,7 @@ class Dispatcher:
             raise
 
         # 3. Project Selection Loop
-        pool = config_manager.project_pool.copy()
+        pool = config_manager.project_pool
         if not pool:
             message = "No active projects loaded."
             job.status = "FAILED"
@@ -105,10 +150,12 @@ class Dispatcher:
             db.commit()
             raise Exception(message)
         
-        random.shuffle(pool)
+        # Random start, then rotate: spreads first picks like a shuffle without permuting
+        # or copying the pool.
+        start = random.randrange(len(pool))
         
         last_error = ""
-        for project_ctx in pool:
+        for project_ctx in chain(islice(pool, start, None), islice(pool, start)):
             project_id = project_ctx["project_id"]
             try:
                 logger.info(f"Dispatching Job {job_uuid} to {project_id}...")
@@ -131,6 +178,7 @@ class Dispatcher:
                 job.vertex_job_id = vertex_job_id
                 job.output_gcs_uri = output_prefix
                 db.commit()
+                self._record_success()
                 
                 return {"job_uuid": job_uuid, "status": "STARTED", "project": project_id}
 
@@ -140,8 +188,8 @@ class Dispatcher:
                 # Continue to next project
 
         # 4. All Failed
-        logger.error("All projects failed. Triggering Cooldown.")
-        self.cooldown_until = time.time() + 60
+        cooldown = self._trigger_cooldown()
+        logger.error(f"All projects failed. Triggering {cooldown:.0f}s Cooldown.")
         
         job.status = "FAILED"
         job.result_summary = f"All projects failed: {last_error or 'Unknown error'}"
@@ -167,47 +215,123 @@ class Dispatcher:
         if time.time() < self.cooldown_until:
              raise Exception("System in cooldown.")
 
-        pool = config_manager.project_pool.copy()
+        pool = config_manager.project_pool
         if not pool:
             raise Exception("No active projects loaded.")
 
         ordered_pool, start_cursor = self._ordered_projects(pool)
         retries = max(1, settings.CHAT_RETRY_PER_PROJECT)
+        chat_kwargs = {
+            "model_id": model_id,
+            "prompt": prompt,
+            "sys_prompt": sys_prompt,
+            "temperature": temperature,
+            "top_p": top_p,
+            "top_k": top_k,
+            "thinking_level": thinking_level,
+            "use_search": use_search,
+        }
 
-        last_error = ""
-        for offset, project_ctx in enumerate(ordered_pool):
-            project_id = project_ctx["project_id"]
-            vertex = VertexHandler(project_ctx)
-
-            for attempt in range(retries):
-                try:
-                    self._apply_project_rate_limit(project_id)
-                    result = vertex.chat_completion(
-                        model_id=model_id,
-                        prompt=prompt,
-                        sys_prompt=sys_prompt,
-                        temperature=temperature,
-                        top_p=top_p,
-                        top_k=top_k,
-                        thinking_level=thinking_level,
-                        use_search=use_search,
-                    )
-                    next_cursor = (start_cursor + offset + 1) % len(pool)
-                    self._mark_chat_success(project_id, next_cursor)
-                    return result
-
-                except Exception as e:
-                    last_error = str(e)
-                    logger.warning(
-                        f"Chat failed on {project_id} (attempt {attempt + 1}/{retries}): {last_error}"
-                    )
-                    if attempt < retries - 1:
-                        time.sleep(self._backoff_delay(attempt))
-            # Continue to next project after local retries exhausted
+        fanout = max(1, min(settings.CHAT_HEDGE_FANOUT, len(ordered_pool)))
+        if fanout == 1:
+            # Default path: already on a worker thread (asyncio.to_thread), so no executor needed.
+            winner, last_error = self._chat_sequential(ordered_pool, retries, chat_kwargs)
+        else:
+            winner, last_error = self._chat_hedged(ordered_pool, fanout, retries, chat_kwargs)
+
+        if winner is not None:
+            offset, result = winner
+            project_id = ordered_pool[offset]["project_id"]
+            next_cursor = (start_cursor + offset + 1) % len(pool)
+            self._mark_chat_success(project_id, next_cursor)
+            self._record_success()
+            return result
         
         # All failed
-        self.cooldown_until = time.time() + 60
+        self._trigger_cooldown()
         raise Exception(f"All projects failed chat. Last error: {last_error}")
 
+    def _chat_sequential(
+        self,
+        ordered_pool: List[Dict[str, Any]],
+        retries: int,
+        chat_kwargs: Dict[str, Any],
+    ) -> Tuple[Optional[Tuple[int, Dict[str, Any]]], str]:
+        """Try projects one after another; returns ((offset, result) or None, last error)."""
+        last_error = ""
+        for offset, project_ctx in enumerate(ordered_pool):
+            try:
+                return (offset, self._chat_with_retries(project_ctx, retries, chat_kwargs)), last_error
+            except Exception as e:
+                last_error = str(e)
+                # Continue to next project after local retries exhausted
+        return None, last_error
+
+    def _chat_hedged(
+        self,
+        ordered_pool: List[Dict[str, Any]],
+        fanout: int,
+        retries: int,
+        chat_kwargs: Dict[str, Any],
+    ) -> Tuple[Optional[Tuple[int, Dict[str, Any]]], str]:
+        """
+        Hedge across projects: keep up to `fanout` projects in flight, start the next one
+        whenever an attempt chain fails, and return the first success.
+        """
+        executor = ThreadPoolExecutor(max_workers=fanout)
+        in_flight: Dict[Future, int] = {}
+        next_offset = 0
+
+        def launch_next() -> None:
+            nonlocal next_offset
+            project_ctx = ordered_pool[next_offset]
+            future = executor.submit(self._chat_with_retries, project_ctx, retries, chat_kwargs)
+            in_flight[future] = next_offset
+            next_offset += 1
+
+        last_error = ""
+        try:
+            while next_offset < fanout:
+                launch_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    offset = in_flight.pop(future)
+                    try:
+                        return (offset, future.result()), last_error
+                    except Exception as e:
+                        last_error = str(e)
+                        # Continue to next project after local retries exhausted
+                        if next_offset < len(ordered_pool):
+                            launch_next()
+        finally:
+            # Losing hedges finish in the background; queued ones are dropped.
+            executor.shutdown(wait=False, cancel_futures=True)
+        return None, last_error
+
+    def _chat_with_retries(
+        self,
+        project_ctx: Dict[str, Any],
+        retries: int,
+        chat_kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        project_id = project_ctx["project_id"]
+        vertex = VertexHandler(project_ctx)
+
+        last_error = ""
+        for attempt in range(retries):
+            try:
+                self._apply_project_rate_limit(project_id)
+                return vertex.chat_completion(**chat_kwargs)
+            except Exception as e:
+                last_error = str(e)
+                logger.warning(
+                    f"Chat failed on {project_id} (attempt {attempt + 1}/{retries}): {last_error}"
+                )
+                if attempt < retries - 1:
+                    time.sleep(self._backoff_delay(attempt))
+        raise Exception(last_error)
+
 dispatcher = Dispatcher()
 
@@ -1,10 +1,25 @@
+import io
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud.storage.retry import DEFAULT_RETRY
 from config.manager import config_manager
 from config.settings import settings
 
+try:
+    import orjson
+except ImportError:  # Fallback to stdlib json when orjson is unavailable
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Read prediction shards in bounded ranges instead of holding a whole file as str.
+OUTPUT_READ_CHUNK_BYTES = 4 * 1024 * 1024
+# Above this size, upload resumably in chunks so a failure retries one chunk, not the whole file.
+# GCS requires resumable chunks to be multiples of 256 KiB.
+RESUMABLE_UPLOAD_THRESHOLD_BYTES = 8 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 32 * 256 * 1024
+
 class GCSHandler:
     def __init__(self):
         pass
@@ -14,6 +29,20 @@ class GCSHandler:
         client = config_manager.get_storage_client()
         return client.bucket(settings.BUCKET_NAME)
 
+    @staticmethod
+    def _serialize_jsonl(data: list) -> io.BytesIO:
+        """Encode items as UTF-8 JSONL into one in-memory stream, one line per item, rewound for upload."""
+        stream = io.BytesIO()
+        write = stream.write
+        for item in data:
+            if orjson is not None:
+                write(orjson.dumps(item))
+            else:
+                write(json.dumps(item, ensure_ascii=False).encode("utf-8"))
+            write(b"\n")
+        stream.seek(0)
+        return stream
+
     def upload_jsonl(self, data: list, destination_blob_name: str) -> str:
         """上传 JSONL 并返回 gs:// URI"""
         try:
@@ -21,8 +50,22 @@ class GCSHandler:
             blob = bucket.blob(destination_blob_name)
             
             # 确保没有 Markdown 污染，纯净 JSONL
-            content = "\n".join([json.dumps(item, ensure_ascii=False) for item in data])
-            blob.upload_from_string(content, content_type="application/jsonl")
+            # Upload straight from the serialization stream; wrapping a separate buffer in BytesIO
+            # would copy the whole payload.
+            stream = self._serialize_jsonl(data)
+            size = stream.getbuffer().nbytes
+            if size > RESUMABLE_UPLOAD_THRESHOLD_BYTES:
+                blob.chunk_size = UPLOAD_CHUNK_BYTES
+            # Re-uploading identical content to the same name is idempotent, so allow retries.
+            # crc32c is validated server-side; google-crc32c computes it in C.
+            blob.upload_from_file(
+                stream,
+                size=size,
+                rewind=True,
+                content_type="application/jsonl",
+                checksum="crc32c",
+                retry=DEFAULT_RETRY,
+            )
             
             uri = f"gs://{bucket.name}/{destination_blob_name}"
             logger.info(f"Uploaded input to {uri}")
@@ -31,27 +74,52 @@ class GCSHandler:
             logger.error(f"GCS Upload Failed: {e}")
             raise
 
+    def _read_output_blob(self, blob) -> list:
+        """Parse one prediction shard; rows read before a parse error are kept."""
+        items = []
+        try:
+            # BlobReader has no readline of its own; unbuffered, IOBase iteration reads one byte at a time.
+            with io.BufferedReader(
+                blob.open("rb", chunk_size=OUTPUT_READ_CHUNK_BYTES),
+                buffer_size=OUTPUT_READ_CHUNK_BYTES,
+            ) as stream:
+                for line in stream:
+                    payload = line.strip()
+                    if payload:
+                        items.append(
+                            orjson.loads(payload) if orjson is not None else json.loads(payload)
+                        )
+        except Exception as e:
+            logger.error(f"Failed to parse blob {blob.name}: {e}")
+        return items
+
     def read_batch_output(self, prefix: str) -> list:
         """读取 Vertex AI 输出目录下的所有 JSONL"""
         # 注意：prefix 必须以 / 结尾，例如 "uuid/stage_1/output/"
         try:
             bucket = self._get_bucket()
+            # Filter and trim listing metadata server-side; the name check below stays authoritative.
+            listing = bucket.list_blobs(
+                prefix=prefix,
+                match_glob=f"{prefix}**.jsonl",
+                fields="items(name,size),nextPageToken",
+            )
+            blobs = [
+                blob
+                for blob in listing
+                if blob.name.endswith(".jsonl") and "prediction-" in blob.name
+            ]
+
             results = []
-            
-            for blob in bucket.list_blobs(prefix=prefix):
-                if blob.name.endswith(".jsonl") and "prediction-" in blob.name:
-                    try:
-                        content = blob.download_as_text()
-                        for line in content.splitlines():
-                            payload = line.strip()
-                            if payload:
-                                results.append(json.loads(payload))
-                    except Exception as e:
-                        logger.error(f"Failed to parse blob {blob.name}: {e}")
+            if blobs:
+                # Shard downloads are independent network reads; overlap them.
+                workers = max(1, min(settings.GCS_READ_PARALLELISM, len(blobs)))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for items in executor.map(self._read_output_blob, blobs):
+                        results.extend(items)
             
             logger.info(f"Read {len(results)} items from {prefix}")
             return results
         except Exception as e:
             logger.error(f"GCS Read Failed: {e}")
             return []
-
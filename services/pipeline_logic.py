@@ -2,8 +2,16 @@ import json
 import re
 import logging
 
+try:
+    import orjson
+except ImportError:  # Fallback to stdlib json when orjson is unavailable
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# ```json / ``` fence markers at the start of any line, with trailing whitespace.
+_FENCE_RE = re.compile(r'^```(?:json)?\s*', re.MULTILINE)
+
 class PipelineLogic:
     
     @staticmethod
@@ -14,19 +22,21 @@ class PipelineLogic:
         if not text:
             return {}
             
-        # 1. 移除 ```json 和 ``` 标记
-        text = re.sub(r'^```json\s*', '', text, flags=re.MULTILINE)
-        text = re.sub(r'^```\s*', '', text, flags=re.MULTILINE)
-        
-        # 2. 尝试提取最外层的 JSON 对象
+        # 1. 尝试提取最外层的 JSON 对象 (leading/trailing fences fall outside the braces)
         start = text.find("{")
         end = text.rfind("}") + 1
-        if start != -1 and end != 0:
+        if start != -1 and end > start:
             text = text[start:end]
+
+        # 2. 移除剩余的 ```json 和 ``` 标记; plain substring check keeps the regex off the common path
+        if "```" in text:
+            text = _FENCE_RE.sub('', text)
             
         try:
+            if orjson is not None:
+                return orjson.loads(text)
             return json.loads(text)
-        except json.JSONDecodeError:
+        except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses this
             logger.warning(f"JSON Parse Failed for text: {text[:50]}...")
             return None
 
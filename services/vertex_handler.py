@@ -1,11 +1,30 @@
-from google.cloud import aiplatform
 import logging
+import threading
 import time
-from typing import Any, Dict, Optional
+from datetime import timezone
+from typing import Any, Dict, Optional, Tuple
+
+from config.manager import auth_request, http_session
 
 logger = logging.getLogger(__name__)
 
+# Refresh a cached bearer token this long before Google's expiry.
+TOKEN_REFRESH_MARGIN_SECONDS = 60
+# BatchPredictionJob.create(sync=False) returns before the create RPC lands; poll for its name.
+# The timeout is generous on purpose: giving up while the RPC is still in flight makes the
+# Dispatcher retry on another project and can leave a duplicate billed job behind.
+RESOURCE_NAME_TIMEOUT_SECONDS = 60.0
+RESOURCE_NAME_POLL_INTERVAL_SECONDS = 0.1
+
+
 class VertexHandler:
+    # project_id -> (access_token, expiry epoch seconds); shared by every handler instance.
+    _token_cache: Dict[str, Tuple[str, float]] = {}
+    _token_locks: Dict[str, threading.Lock] = {}
+    _token_locks_guard = threading.Lock()
+    _init_key: Optional[Tuple[str, str, int]] = None
+    _init_lock = threading.Lock()
+
     def __init__(self, project_context: Optional[Dict[str, Any]] = None):
         """
         :param project_context: Dict containing 'project_id', 'credentials', 'region'
@@ -17,6 +36,50 @@ class VertexHandler:
             raise ValueError("VertexHandler requires a project_context to operate.")
         return self.context
 
+    @classmethod
+    def _cached_token(cls, project_id: str) -> Optional[str]:
+        cached = cls._token_cache.get(project_id)
+        if cached and cached[1] - time.time() > TOKEN_REFRESH_MARGIN_SECONDS:
+            return cached[0]
+        return None
+
+    @classmethod
+    def _invalidate_token(cls, project_id: str) -> None:
+        cached = cls._token_cache.get(project_id)
+        if cached:
+            # Keep the token but zero its expiry so the next caller knows to replace it.
+            cls._token_cache[project_id] = (cached[0], 0.0)
+
+    def _get_access_token(self) -> str:
+        """Return a bearer token for this project, refreshing at most once across concurrent callers."""
+        context = self._require_context()
+        project_id = context['project_id']
+        token = self._cached_token(project_id)
+        if token:
+            return token
+
+        with VertexHandler._token_locks_guard:
+            project_lock = VertexHandler._token_locks.setdefault(project_id, threading.Lock())
+
+        with project_lock:
+            token = self._cached_token(project_id)
+            if token:
+                return token
+
+            creds = context['credentials']
+            stale = VertexHandler._token_cache.get(project_id)
+            if not creds.valid or (stale and stale[0] == creds.token):
+                creds.refresh(auth_request)
+
+            # google-auth reports expiry as naive UTC.
+            expiry_ts = (
+                creds.expiry.replace(tzinfo=timezone.utc).timestamp()
+                if creds.expiry
+                else time.time() + TOKEN_REFRESH_MARGIN_SECONDS * 2
+            )
+            VertexHandler._token_cache[project_id] = (creds.token, expiry_ts)
+            return creds.token
+
     @staticmethod
     def _build_chat_model_path(model_id: str) -> str:
         normalized = model_id.strip()
@@ -32,15 +95,45 @@ class VertexHandler:
         return f"publishers/google/models/{normalized}"
 
     def _init_client(self):
+        # Deferred: aiplatform drags in gRPC/protobuf stubs that the REST chat path never uses.
+        from google.cloud import aiplatform
+
         context = self._require_context()
-        
-        aiplatform.init(
-            project=context['project_id'],
-            location=context['region'],
-            credentials=context['credentials']
-        )
+        # aiplatform.init mutates process-wide config, so only the last applied key is valid.
+        init_key = (context['project_id'], context['region'], id(context['credentials']))
+        with VertexHandler._init_lock:
+            if VertexHandler._init_key == init_key:
+                return
+            aiplatform.init(
+                project=context['project_id'],
+                location=context['region'],
+                credentials=context['credentials']
+            )
+            VertexHandler._init_key = init_key
+
+    @staticmethod
+    def _wait_for_resource_name(job: Any) -> str:
+        """Return the job's resource name once the async create lands, or raise its failure."""
+        deadline = time.monotonic() + RESOURCE_NAME_TIMEOUT_SECONDS
+        while True:
+            # `job.resource_name` raises RuntimeError until creation completes, so read the proto.
+            resource_name = getattr(getattr(job, "_gca_resource", None), "name", None)
+            if resource_name:
+                return resource_name
+            if job._are_futures_done():
+                # Creation finished without a resource: this re-raises the create RPC's error.
+                job.wait_for_resource_creation()
+                continue
+            if time.monotonic() >= deadline:
+                raise RuntimeError(
+                    f"Vertex job resource name unavailable after {RESOURCE_NAME_TIMEOUT_SECONDS:.0f}s; "
+                    "the create request may still complete in the background"
+                )
+            time.sleep(RESOURCE_NAME_POLL_INTERVAL_SECONDS)
 
     def submit_job(self, job_name: str, model_id: str, input_uri: str, output_prefix: str) -> str:
+        from google.cloud import aiplatform
+
         self._init_client()
         context = self._require_context()
         
@@ -59,19 +152,13 @@ class VertexHandler:
                 gcs_source=[input_uri],
                 predictions_format="jsonl",
                 gcs_destination_prefix=output_prefix, # Expecting gs://...
+                project=context['project_id'],
+                location=context['region'],
+                credentials=context['credentials'],
                 sync=False,
             )
 
-            resource_name = getattr(job, "resource_name", None) or getattr(job, "name", None)
-            if not resource_name:
-                for _ in range(6):
-                    time.sleep(0.5)
-                    resource_name = getattr(job, "resource_name", None) or getattr(job, "name", None)
-                    if resource_name:
-                        break
-
-            if not resource_name:
-                raise RuntimeError("Vertex job created, but resource name is unavailable")
+            resource_name = self._wait_for_resource_name(job)
 
             logger.info(f"Submitted Vertex Job: {resource_name} in {context['project_id']}")
             return resource_name
@@ -80,7 +167,9 @@ class VertexHandler:
             raise
 
     def get_job_status(self, job_resource_name: str) -> str:
-        self._init_client()
+        from google.cloud import aiplatform
+
+        # Project, location and credentials are passed explicitly, so the global init is not needed.
         context = self._require_context()
         try:
             job = aiplatform.BatchPredictionJob(
@@ -106,17 +195,10 @@ class VertexHandler:
         Real-time Chat via Direct REST API (v1beta1)
         Matches user's exact payload structure.
         """
-        import requests
-        from google.auth.transport.requests import Request
-
         try:
             context = self._require_context()
 
-            creds = context['credentials']
-            if not creds.valid:
-                creds.refresh(Request())
-            
-            access_token = creds.token
+            access_token = self._get_access_token()
             project_id = context['project_id']
             region = context['region']
             
@@ -168,8 +250,12 @@ class VertexHandler:
                 }]
 
             # requests respects env vars for proxy
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = http_session.post(url, headers=headers, json=payload, timeout=60)
             
+            if response.status_code == 401:
+                # Token revoked or rotated server-side; force a refresh on the next call.
+                self._invalidate_token(project_id)
+
             if response.status_code != 200:
                  logger.error(f"Google API Error {response.status_code}: {response.text}")
                  raise Exception(f"Google API Error: {response.text}")
@@ -14,6 +14,9 @@ API_URL = "http://127.0.0.1:8000"
 BUCKET_NAME = os.getenv("BUCKET_NAME")
 CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 
+# Steps 2-5 share one keep-alive connection to the local API.
+session = requests.Session()
+
 # 颜色输出
 class Colors:
     HEADER = '\033[95m'
@@ -57,7 +60,7 @@ def step_1_check_gcp_auth():
 def step_2_check_api_health():
     log("Step 2: Checking API Health...")
     try:
-        res = requests.get(f"{API_URL}/health")
+        res = session.get(f"{API_URL}/health")
         if res.status_code == 200:
             log("API is healthy", "PASS")
             return True
@@ -72,7 +75,7 @@ def step_3_submit_job():
     log("Step 3: Submitting Test Job...")
     payload = {"topic": "Automated Test: Future of AI"}
     try:
-        res = requests.post(f"{API_URL}/api/submit", json=payload)
+        res = session.post(f"{API_URL}/api/submit", json=payload)
         if res.status_code == 200:
             data = res.json()
             job_uuid = data.get("job_uuid")
@@ -114,7 +117,7 @@ def step_4_verify_gcs_artifacts(job_uuid):
 def step_5_monitor_status(job_uuid):
     log(f"Step 5: Monitoring Job Status (10s check)...")
     for i in range(5):
-        res = requests.get(f"{API_URL}/api/jobs/{job_uuid}")
+        res = session.get(f"{API_URL}/api/jobs/{job_uuid}")
         data = res.json()
         status = data.get("status")
         stage = data.get("current_stage")
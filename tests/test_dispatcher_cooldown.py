@@ -0,0 +1,68 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from services import dispatcher as dispatcher_module
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _make_dispatcher(monkeypatch) -> tuple:
+    clock = _Clock()
+    monkeypatch.setattr(dispatcher_module.time, "time", clock)
+    return dispatcher_module.Dispatcher(), clock
+
+
+def test_sustained_outage_reaches_max_cooldown(monkeypatch):
+    dispatcher, clock = _make_dispatcher(monkeypatch)
+
+    cooldown = 0.0
+    # Fail again every time the previous cooldown expires, for longer than the window.
+    for _ in range(50):
+        cooldown = dispatcher._trigger_cooldown()
+        clock.now += cooldown
+
+    assert cooldown == settings.COOLDOWN_MAX_SECONDS
+
+
+def test_lone_failure_stays_near_floor(monkeypatch):
+    dispatcher, _ = _make_dispatcher(monkeypatch)
+
+    cooldown = dispatcher._trigger_cooldown()
+
+    span = settings.COOLDOWN_MAX_SECONDS - settings.COOLDOWN_MIN_SECONDS
+    assert cooldown <= settings.COOLDOWN_MIN_SECONDS + span / settings.COOLDOWN_MIN_SAMPLES
+
+
+def test_old_failures_age_out(monkeypatch):
+    dispatcher, clock = _make_dispatcher(monkeypatch)
+
+    for _ in range(30):
+        dispatcher._trigger_cooldown()
+    clock.now += settings.COOLDOWN_WINDOW_SECONDS + 1
+
+    cooldown = dispatcher._trigger_cooldown()
+
+    span = settings.COOLDOWN_MAX_SECONDS - settings.COOLDOWN_MIN_SECONDS
+    assert cooldown <= settings.COOLDOWN_MIN_SECONDS + span / settings.COOLDOWN_MIN_SAMPLES
+
+
+def test_successes_dilute_failure_ratio(monkeypatch):
+    dispatcher, clock = _make_dispatcher(monkeypatch)
+
+    for _ in range(20):
+        dispatcher._record_success()
+        clock.now += 1
+    cooldown = dispatcher._trigger_cooldown()
+
+    assert cooldown < settings.COOLDOWN_MIN_SECONDS + (
+        settings.COOLDOWN_MAX_SECONDS - settings.COOLDOWN_MIN_SECONDS
+    ) / 2
@@ -1,94 +1,130 @@
 import os
+import re
 import sys
+import math
+import functools
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 from collections import Counter
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from config.manager import config_manager
 from config.settings import settings
 
-# Setup Logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("verify_v5")
 
-def check_proxy():
-    print("\n--- 1. Proxy Verification ---")
-    proxy = os.environ.get("HTTPS_PROXY") or os.environ.get("https_proxy")
-    print(f"Configured Proxy: {proxy}")
+# Reused across probes so repeat checks skip the TCP/TLS handshake through the proxy.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+
+_project_id = itemgetter("project_id")
+# Placeholders from the docs' example `-e HTTPS_PROXY=...` command.
+_PLACEHOLDER_RE = re.compile(r"username:password|ip:port")
+
+# Chi-square needs roughly >= 5 expected hits per project to be meaningful.
+MIN_SIMULATION_DRAWS = 20
+DRAWS_PER_PROJECT = 5
+# Upper-tail z-score for a 1% false alarm rate.
+UNIFORMITY_Z_99 = 2.3263
+
+def _chi2_critical(df: int, z: float = UNIFORMITY_Z_99) -> float:
+    """Wilson-Hilferty approximation of the chi-square quantile; avoids a scipy dependency."""
+    k = 2.0 / (9.0 * df)
+    return df * (1.0 - k + z * math.sqrt(k)) ** 3
+
+@functools.lru_cache(maxsize=None)
+def _configured_proxy() -> Optional[str]:
+    # Read once: ConfigManager.apply_proxy has already run by the time any check calls this.
+    return os.environ.get("HTTPS_PROXY") or os.environ.get("https_proxy")
+
+def check_proxy() -> List[str]:
+    out: List[str] = []
+    out.append("\n--- 1. Proxy Verification ---")
+    proxy = _configured_proxy()
+    out.append(f"Configured Proxy: {proxy}")
     
     if not proxy:
-        print("[INFO] No proxy configured (direct connect).")
-        return
+        out.append("[INFO] No proxy configured (direct connect).")
+        return out
 
-    if "username:password" in proxy or "ip:port" in proxy:
-         print("[ERROR] You are using the default placeholder 'username:password@ip:port'.")
-         print("   Please restart the container with your ACTUAL proxy credentials in the -e HTTPS_PROXY command.")
-         return
+    if _PLACEHOLDER_RE.search(proxy):
+         out.append("[ERROR] You are using the default placeholder 'username:password@ip:port'.")
+         out.append("   Please restart the container with your ACTUAL proxy credentials in the -e HTTPS_PROXY command.")
+         return out
     
     try:
-        print("Attempting to fetch external IP via Proxy...")
-        # timeout set to 10s to fail fast if proxy is bad
-        response = requests.get("https://api.ipify.org?format=json", timeout=10)
-        data = response.json()
-        print(f"[OK] External IP: {data['ip']}")
-        print("(Please verify this matches your Proxy IP)")
+        out.append("Attempting to fetch external IP via Proxy...")
+        # timeout set to 10s to fail fast if proxy is bad; the bare endpoint answers in plain text
+        response = _session.get("https://api.ipify.org", proxies={"https": proxy}, timeout=10)
+        response.raise_for_status()
+        out.append(f"[OK] External IP: {response.text.strip()}")
+        out.append("(Please verify this matches your Proxy IP)")
     except Exception as e:
-        print(f"[ERROR] Proxy Test Failed: {e}")
+        out.append(f"[ERROR] Proxy Test Failed: {e}")
         if "Missing dependencies for SOCKS support" in str(e):
-             print("   (Ensure pysocks is installed via requirements.txt)")
+             out.append("   (Ensure pysocks is installed via requirements.txt)")
+    return out
 
-def check_keys():
-    print("\n--- 2. Key Loading Verification ---")
-    pool = config_manager.project_pool
-    print(f"Active Key Group: {settings.ACTIVE_KEY_GROUP}")
-    print(f"Loaded Projects Count: {len(pool)}")
+def check_keys() -> List[str]:
+    out: List[str] = []
+    out.append("\n--- 2. Key Loading Verification ---")
+    project_ids = config_manager.project_ids
+    out.append(f"Active Key Group: {settings.ACTIVE_KEY_GROUP}")
+    out.append(f"Loaded Projects Count: {len(project_ids)}")
     
-    if not pool:
-        print("[ERROR] No keys loaded! Check json/ directory.")
-        return
+    if not project_ids:
+        out.append("[ERROR] No keys loaded! Check json/ directory.")
+        return out
 
-    for p in pool:
-        project_id = p.get("project_id") if isinstance(p, dict) else None
-        print(f" - Loaded: {project_id}")
+    out.extend(f" - Loaded: {project_id}" for project_id in project_ids)
+    return out
 
-def check_randomization():
-    print("\n--- 3. Random Dispatch Verification (Simulation) ---")
+def check_randomization() -> List[str]:
+    out: List[str] = []
+    out.append("\n--- 3. Random Dispatch Verification (Simulation) ---")
     pool = config_manager.project_pool
     if not pool:
-        print("Skipping randomization test (no keys).")
-        return
-
-    print("Simulating 20 project selections...")
-    results = []
-    for _ in range(20):
-        proj = config_manager.get_random_project()
-        if not isinstance(proj, dict):
-            continue
-        project_id = proj.get("project_id")
-        if project_id:
-            results.append(project_id)
-
-    if not results:
-        print("[WARN] No project selected during simulation.")
-        return
-    
-    counts = Counter(results)
-    for pid, count in counts.items():
-        print(f" - Project {pid}: selected {count} times")
+        out.append("Skipping randomization test (no keys).")
+        return out
+
+    draws = max(MIN_SIMULATION_DRAWS, DRAWS_PER_PROJECT * len(pool))
+    out.append(f"Simulating {draws} project selections...")
+    # Loaded contexts always carry a non-empty project_id.
+    counts = Counter(map(_project_id, config_manager.get_random_projects(draws)))
+
+    if not counts:
+        out.append("[WARN] No project selected during simulation.")
+        return out
     
-    if len(counts) > 1:
-        print("[OK] Randomization is working (multiple projects selected).")
+    out.extend(f" - Project {pid}: selected {count} times" for pid, count in counts.most_common())
+
+    if len(pool) == 1:
+        out.append("[INFO] Single project loaded; uniformity check skipped.")
+        return out
+
+    # Pearson chi-square against a uniform pick; projects never drawn contribute `expected` each.
+    expected = draws / len(pool)
+    chi2 = sum((count - expected) ** 2 / expected for count in counts.values())
+    chi2 += (len(pool) - len(counts)) * expected
+    critical = _chi2_critical(len(pool) - 1)
+    if chi2 <= critical:
+        out.append(f"[OK] Selection looks uniform (chi2={chi2:.2f} <= {critical:.2f} at p=0.01).")
     else:
-        print("[WARN] Only one project selected (could be chance if pool is key small, or logic error).")
+        out.append(f"[WARN] Selection looks biased (chi2={chi2:.2f} > {critical:.2f} at p=0.01).")
+    return out
 
 if __name__ == "__main__":
+    # Setup Logging (script runs only; importers keep their own root config)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     print("=== Accessing Headless Orchestrator Verification (v5) ===")
-    
-    # Check 1: Keys (Loaded by ConfigManager init)
-    check_keys()
-    
-    # Check 2: Proxy
-    check_proxy()
-    
-    # Check 3: Logic
-    check_randomization()
+
+    # Checks are independent: overlap the proxy round trip with the local ones,
+    # then print each section in the usual keys/proxy/logic order.
+    checks = (check_keys, check_proxy, check_randomization)
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = [executor.submit(check) for check in checks]
+        for future in futures:
+            print("\n".join(future.result()))
     print("\n=== Verification Complete ===\n")